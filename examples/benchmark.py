@@ -0,0 +1,126 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+# Copyright (c) 2014, Tobias Hommel
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+#  * Redistributions of source code must retain the above copyright notice, this
+#    list of conditions and the following disclaimer.
+#  * Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+#  * Neither the name of the author nor the names of its contributors may
+#    be used to endorse or promote products derived from this software without
+#    specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+"""Measure the time needed to import logex, the per-call overhead of logex wrappers on the happy path, i.e.
+without exceptions, and how the throughput of the exception path scales with the number of threads.
+
+On free-threaded Python builds, the throughput should grow with the number of cores."""
+
+from __future__ import (division, absolute_import, print_function, unicode_literals)
+
+import os.path
+import subprocess
+import sys
+import threading
+import time
+import timeit
+
+import logex
+
+CALLS = 1000000
+EXCEPTIONS = 20000
+# the minimum share of the single thread throughput every additional thread must add on free-threaded builds
+MIN_SCALING = 0.5
+# modules which must only be imported when they are needed, not by "import logex"
+DEFERRED_MODULES = ('inspect', 'ast', 'dis', 'concurrent.futures', 'multiprocessing', 'struct', 'zlib')
+
+def function(a, b=None):
+	return a
+
+def measure(name, f):
+	seconds = min(timeit.repeat(lambda: f(1, 'abc'), number=CALLS, repeat=5))
+	print('%-25s %7.1f ns/call' % (name, seconds / CALLS * 1e9))
+
+def measure_import():
+	"""Import logex in a fresh interpreter, print the time it takes and fail if expensive modules are imported."""
+	code = ('import logging, sys; before = set(sys.modules); import logex; '
+			'print(" ".join(sorted(set(sys.modules) - before)))')
+	env = dict(os.environ, PYTHONPATH=os.path.dirname(os.path.dirname(os.path.abspath(logex.__file__))))
+	process = subprocess.Popen([sys.executable, '-X', 'importtime', '-c', code], env=env,
+							   stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True)
+	stdout, stderr = process.communicate()
+	for line in stderr.splitlines():
+		if line.endswith('| logex'):
+			print('%-25s %7.1f ms' % ('import logex', int(line.split('|')[1]) / 1000.0))
+	imported = stdout.split()
+	deferred = [module for module in DEFERRED_MODULES if module in imported]
+	if deferred:
+		raise SystemExit('import logex imports %s' % ', '.join(deferred))
+
+def failing(a, b=None):
+	raise ValueError(a)
+
+def measure_exception_scaling():
+	"""Handle exceptions with a source view in 1, 2, 4, ... threads, print the throughput and fail if it does not scale.
+
+	Scaling is only checked on free-threaded builds with the GIL disabled, and needs at least 2 cores.
+	"""
+	wrapped = logex.log(failing, logfunction=lambda message: None, reraise=False, view_source=True)
+	is_gil_enabled = getattr(sys, '_is_gil_enabled', lambda: True)
+	print('exception path, GIL %s:' % ('enabled' if is_gil_enabled() else 'disabled'))
+	cpus = os.cpu_count() if hasattr(os, 'cpu_count') else 1
+	counts = [1]
+	while counts[-1] * 2 <= (cpus or 1):
+		counts.append(counts[-1] * 2)
+	wrapped(1, 'abc')
+	base = None
+	for count in counts:
+		start = threading.Event()
+		per_thread = EXCEPTIONS // count
+
+		def run():
+			start.wait()
+			for i in range(per_thread):
+				wrapped(i, 'abc')
+		threads = [threading.Thread(target=run) for i in range(count)]
+		for thread in threads:
+			thread.start()
+		begin = time.time()
+		start.set()
+		for thread in threads:
+			thread.join()
+		throughput = per_thread * count / (time.time() - begin)
+		base = base or throughput
+		print('%2d threads %10.0f exceptions/s  x%.2f' % (count, throughput, throughput / base))
+	if is_gil_enabled() or count < 2:
+		print('scaling not checked, it needs a free-threaded build and at least 2 cores')
+	elif throughput / base < 1 + MIN_SCALING * (count - 1):
+		raise SystemExit('the exception path does not scale: x%.2f with %d threads, expected at least x%.2f' % (
+			throughput / base, count, 1 + MIN_SCALING * (count - 1)))
+
+def main():
+	measure_import()
+	measure('undecorated', function)
+	measure('log()', logex.log(function))
+	measure('log(specialize=True)', logex.log(function, specialize=True))
+	measure('log(breaker={})', logex.log(function, breaker={}))
+	measure('log(breadcrumbs=16)', logex.log(function, breadcrumbs=16))
+	measure('log(watchdog=10)', logex.log(function, watchdog=10))
+	measure_exception_scaling()
+
+if __name__ == '__main__':
+	main()
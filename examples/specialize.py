@@ -0,0 +1,114 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+# Copyright (c) 2014, Tobias Hommel
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+#  * Redistributions of source code must retain the above copyright notice, this
+#    list of conditions and the following disclaimer.
+#  * Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+#  * Neither the name of the author nor the names of its contributors may
+#    be used to endorse or promote products derived from this software without
+#    specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+# ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+"""Check that signature-specialized wrappers behave like the generic wrapper for all kinds of signatures, both when
+the decorated function returns and when it fails."""
+
+from __future__ import (division, absolute_import, print_function, unicode_literals)
+
+import functools
+import inspect
+import sys
+
+import logex
+
+# (signature of a function, a list of (args, kwargs) to call it with, minimum Python version for the syntax),
+# every function gets a keyword argument `fail` to make it raise an exception
+SHAPES = [
+	('a, b=2, fail=False', [((1,), {}), ((1, 3), {}), ((1,), {'b': 3})], (3, 5)),
+	('a, /, b, c=3, fail=False', [((1, 2), {}), ((1,), {'b': 2, 'c': 4})], (3, 8)),
+	('a, *, b, c=3, fail=False', [((1,), {'b': 2}), ((1,), {'c': 4, 'b': 2})], (3, 5)),
+	('*args, fail=False, **kwargs', [((), {}), ((1, 2), {'x': 3})], (3, 5)),
+	('a, *args, b=2, fail=False, **kwargs', [((1,), {}), ((1, 2, 3), {'b': 4, 'x': 5})], (3, 5)),
+	# names which are used by the generated wrapper
+	('dict, fail=False, **kw', [((1,), {}), ((1,), {'x': 2})], (3, 5)),
+	('tuple, args, kwargs, wrapper_f=None, fail=False', [((1, 2, 3), {}), ((1, 2, 3), {'wrapper_f': 4})], (3, 5)),
+]
+
+class Failure(Exception):
+	pass
+
+def result(arguments):
+	if arguments.pop('fail'):
+		raise Failure()
+	return sorted(arguments.items())
+
+def with_context(f):
+	"""A decorator which changes the parameters of the decorated function."""
+	@functools.wraps(f)
+	def wrapper(*args, **kwargs):
+		return f('context', *args, **kwargs)
+	return wrapper
+
+@with_context
+def handler(context, x, fail=False):
+	return result({'context': context, 'x': x, 'fail': fail})
+
+def bind(f, args, kwargs):
+	bound = inspect.signature(f, follow_wrapped=False).bind(*args, **kwargs)
+	bound.apply_defaults()
+	return dict(bound.arguments)
+
+def check(name, f, calls, specialized=True):
+	"""Compare the results and the logged arguments of a generic and a specialized wrapper for `f`.
+
+	The specialized wrapper passes arguments to the log function as positional arguments where possible, so the
+	logged arguments are compared after binding them to the signature of `f`.
+	"""
+	logged = []
+
+	def logfunction(template, args, kwargs, exc, **ignored):
+		logged.append((exc[0], bind(f, args, kwargs)))
+	generic = logex.log(f, logfunction=logfunction, advanced=True, reraise=False)
+	wrapper = logex.log(f, logfunction=logfunction, advanced=True, reraise=False, specialize=True)
+	if wrapper.__code__.co_filename.startswith('<logex wrapper') != specialized:
+		raise SystemExit('%s: expected a %s wrapper' % (name, 'specialized' if specialized else 'generic'))
+	for args, kwargs in calls:
+		for fail in (False, True):
+			del logged[:]
+			expected = generic(*args, **dict(kwargs, fail=fail))
+			got = wrapper(*args, **dict(kwargs, fail=fail))
+			if got != expected or len(logged) != (2 if fail else 0) or logged[:1] != logged[1:]:
+				raise SystemExit('%s: calling with %r %r, expected %r, got %r, logged %r' % (
+					name, args, kwargs, expected, got, logged))
+	print('%-50s ok' % name)
+
+def main():
+	if sys.version_info < (3, 5):
+		raise SystemExit('specialized wrappers need Python 3.5 or newer')
+	for signature, calls, version in SHAPES:
+		if sys.version_info < version:
+			continue
+		namespace = {'result': result}
+		exec('def f(%s):\n\treturn result(locals().copy())' % signature, namespace)
+		check('f(%s)' % signature, namespace['f'], calls)
+	# positional-only parameters cannot be declared before Python 3.8, so the generic wrapper is used
+	check('divmod', divmod, [], specialized=sys.version_info >= (3, 8))
+	check('functools.wraps decorator', handler, [((5,), {})])
+
+if __name__ == '__main__':
+	main()
@@ -41,11 +41,18 @@ name as the decorator parameter, only in uppercase.
 
 from __future__ import (division, absolute_import, print_function, unicode_literals)
 
-import inspect
+import atexit
+import collections
+import linecache
 import logging
+import os
+import threading
+import time
 import traceback
+import types
 import functools
 import sys
+import weakref
 
 __version__ = '2.1.1'
 
@@ -59,19 +66,465 @@ RERAISE = True
 CATCHALL = False
 VIEW_SOURCE = False
 DETECT_NESTED = True
+BREAKER = None
+SPECIALIZE = False
+LOGGER = None
+LEVEL = logging.ERROR
+POLICIES = None
+BREADCRUMBS = 0
+DEDUP = None
+WATCHDOG = 0
+CHAIN_DEPTH = 5
 
 _logger = logging.getLogger('logex')
+# importing inspect is expensive and it is only needed for the source view, so it is imported by warm_up()
+inspect = None
+_clock = getattr(time, 'monotonic', time.time)
+# code objects of all wrapper functions, used to detect nested logex calls. The set is replaced instead of changed, so
+# the exception path reads it without contending for a lock.
+_wrapper_codes = frozenset()
+_wrapper_codes_lock = threading.Lock()
+# factories for signature-specialized wrappers, by signature shape
+_specialized_factories = {}
+# the parts of source views which do not depend on the locals, see _add_frames_view()
+_source_view_cache = {}
+_SOURCE_VIEW_CACHE_SIZE = 256
 
 
-def _get_next_code_name(tb, wrapper_code):
-	while tb is not None:
-		if tb.tb_frame.f_code is wrapper_code:
-			tb = tb.tb_next
+class CircuitOpenError(Exception):
+	"""Raised instead of calling a decorated function while its circuit breaker is open."""
+
+
+class CircuitBreaker(object):
+	"""A circuit breaker that makes a decorated function fail fast while it keeps failing the same way.
+
+	Exceptions are counted per fingerprint, i.e. exception type and the location it was raised at. As soon as
+	`threshold` exceptions with the same fingerprint occurred within `window` seconds, the circuit opens: the decorated
+	function is not called anymore and nothing is logged, the call raises `error` or, if `error` is None, returns
+	`result` instead. After `cooldown` seconds the circuit becomes half-open and a single call is let through as a
+	probe. If the probe succeeds the circuit is closed again, otherwise it is re-opened for another `cooldown` seconds.
+	Every state transition is logged once to the "logex" logger.
+
+	An instance holds the state of the circuit, so pass a new instance (or a dict of keyword arguments for this class)
+	to every decorated function which should have its own circuit.
+
+	:param threshold: the number of exceptions with the same fingerprint needed to open the circuit
+	:type threshold: int
+	:param window: the time span in seconds in which `threshold` exceptions must occur
+	:type window: float
+	:param cooldown: the number of seconds to wait before probing an open circuit
+	:type cooldown: float
+	:param error: an exception class or instance which is raised for calls rejected by an open circuit, or None
+	:param result: the value returned for calls rejected by an open circuit if `error` is None
+	:param name: the name used when logging state transitions, defaults to the name of the decorated function
+	:type name: str
+	"""
+	CLOSED = 'closed'
+	OPEN = 'open'
+	HALF_OPEN = 'half-open'
+
+	_MAX_FINGERPRINTS = 256
+
+	def __init__(self, threshold=5, window=60.0, cooldown=30.0, error=CircuitOpenError, result=None, name=None):
+		self.threshold = threshold
+		self.window = window
+		self.cooldown = cooldown
+		self.error = error
+		self.result = result
+		self.name = name
+		self.state = self.CLOSED
+		self._failures = {}
+		self._changed_at = 0.0
+		self._lock = threading.Lock()
+
+	def _transition(self, state, reason):
+		self.state = state
+		self._changed_at = _clock()
+		_logger.warning('circuit breaker for %s is %s: %s', self.name, state, reason)
+
+	def allow(self):
+		"""Check if a call may be passed to the decorated function.
+
+		:rtype: bool
+		"""
+		if self.state is self.CLOSED:
+			return True
+		with self._lock:
+			if self.state is self.CLOSED:
+				return True
+			if _clock() - self._changed_at < self.cooldown:
+				return False
+			# either the cooldown is over, or a previous probe never returned(e.g. due to an exception which is not
+			# caught without `catchall`), so this call is the next probe
+			if self.state is self.OPEN:
+				self._transition(self.HALF_OPEN, 'probing with next call')
+			else:
+				self._changed_at = _clock()
+			return True
+
+	def success(self):
+		"""Record a successful call."""
+		if self.state is self.CLOSED:
+			return
+		with self._lock:
+			if self.state is self.HALF_OPEN:
+				self._failures.clear()
+				self._transition(self.CLOSED, 'probe succeeded')
+
+	def failure(self, fingerprint):
+		"""Record a failed call.
+
+		:param fingerprint: identifies the kind of failure, see `_exception_fingerprint()`
+		:type fingerprint: str
+		"""
+		now = _clock()
+		with self._lock:
+			if self.state is self.HALF_OPEN:
+				self._transition(self.OPEN, 'probe failed with %s' % fingerprint)
+				return
+			if self.state is self.OPEN:
+				return
+			times = self._failures.get(fingerprint)
+			if times is None:
+				if len(self._failures) >= self._MAX_FINGERPRINTS:
+					self._failures = dict((fp, t) for fp, t in self._failures.items() if now - t[-1] <= self.window)
+				times = self._failures[fingerprint] = collections.deque(maxlen=self.threshold)
+			times.append(now)
+			if len(times) >= self.threshold and now - times[0] <= self.window:
+				self._failures.clear()
+				self._transition(self.OPEN, '%d exceptions %s within %ss' % (self.threshold, fingerprint, self.window))
+
+	def reject(self):
+		"""Raise `error` or return `result` for a call which is not passed to the decorated function."""
+		if self.error is not None:
+			raise self.error
+		return self.result
+
+
+class Policy(object):
+	"""Settings which override the settings of `log()` for certain exception types, see `PolicyTable`.
+
+	Every setting which is None is taken from `log()`.
+
+	:param view_source: if False, skip rendering the source and locals view
+	:type view_source: bool
+	:param level: the log level, only used with a `logger`
+	:type level: int
+	:param template: the template for the message
+	:type template: str
+	:param reraise: whether to re-raise the exception, ignored by `excepthook` and for futures(see `instrument`)
+	:type reraise: bool
+	"""
+
+	def __init__(self, view_source=None, level=None, template=None, reraise=None):
+		self.view_source = view_source
+		self.level = level
+		self.template = template
+		self.reraise = reraise
+
+	def __repr__(self):
+		return 'Policy(view_source=%r, level=%r, template=%r, reraise=%r)' % (
+			self.view_source, self.level, self.template, self.reraise)
+
+
+class PolicyTable(object):
+	"""Map exception classes to a `Policy`.
+
+	The policy for an exception type is the one for the first class in its MRO that has a policy, so a policy for
+	OSError also applies to ConnectionError, unless ConnectionError has its own policy. Lookups are cached per type.
+
+	>>> logex.POLICIES = {
+	>>> 	ConnectionError: logex.Policy(view_source=False, level=logging.WARNING),
+	>>> 	TimeoutError: {'view_source': False, 'reraise': False},
+	>>> }
+
+	:param policies: a dict mapping exception classes to a `Policy` or a dict of keyword arguments for `Policy`
+	:type policies: dict
+	"""
+	_MAX_CACHED = 1024
+
+	def __init__(self, policies):
+		self._policies = dict((class_, policy if isinstance(policy, Policy) else Policy(**policy))
+							  for class_, policy in policies.items())
+		self._cache = {}
+
+	def lookup(self, type_):
+		"""Get the policy for an exception type.
+
+		:param type_: the exception type
+		:rtype: Policy or None
+		"""
+		try:
+			return self._cache[type_]
+		except KeyError:
+			pass
+		policy = None
+		for class_ in getattr(type_, '__mro__', (type_,)):
+			policy = self._policies.get(class_)
+			if policy is not None:
+				break
+		if len(self._cache) >= self._MAX_CACHED:
+			# replace the cache instead of clearing it, lookups of other threads keep using the old one
+			self._cache = {}
+		self._cache[type_] = policy
+		return policy
+
+# the last dict given as POLICIES and the PolicyTable created for it, replaced as a whole so threads never see a
+# table for another dict
+_global_policies = (None, None)
+
+def _get_policy_table(policies):
+	"""Get a PolicyTable for a dict of policies, None and PolicyTables are returned unchanged."""
+	global _global_policies
+	if policies is None or isinstance(policies, PolicyTable):
+		return policies
+	last_policies, table = _global_policies
+	if last_policies is policies:
+		return table
+	table = PolicyTable(policies)
+	if policies is POLICIES:
+		_global_policies = (policies, table)
+	return table
+
+_BREADCRUMB_CHEAP_TYPES = frozenset([bool, int, type(2 ** 64), float, complex, type(None)])
+_BREADCRUMB_TEXT_TYPES = frozenset([type(b''), type(u'')])
+
+
+class _BreadcrumbTrail(object):
+	"""A preallocated ring buffer for the last calls to a decorated function in one thread.
+
+	Every entry is a tuple (timestamp, args, kwargs). The wrapper only stores references, summarizing the arguments is
+	left to `_summarize_breadcrumbs`. Trails are only accessed by their own thread, so they do not need any locks.
+	"""
+	__slots__ = ('entries', 'index')
+
+	def __init__(self, size):
+		self.entries = [None] * size
+		self.index = 0
+
+	def snapshot(self):
+		"""Get all entries, oldest first.
+
+		:rtype: list
+		"""
+		return [entry for entry in self.entries[self.index:] + self.entries[:self.index] if entry is not None]
+
+def _summarize_breadcrumbs(breadcrumbs):
+	"""Summarize the arguments of the last calls to a function.
+
+	Only values of simple immutable types and short strings are kept as their repr, for all other values only the type
+	is kept. The summaries can therefore be pickled, e.g. by logging.handlers.SocketHandler, and do not keep the
+	arguments alive.
+
+	:param breadcrumbs: a list of (timestamp, args, kwargs) tuples, see `_BreadcrumbTrail`
+	:return: a list of (timestamp, args, kwargs) tuples, with strings instead of the arguments
+	:rtype: list
+	"""
+	def summary(value):
+		if type(value) in _BREADCRUMB_CHEAP_TYPES or (type(value) in _BREADCRUMB_TEXT_TYPES and len(value) <= 40):
+			return repr(value)
+		return '<%s>' % type(value).__name__
+	return [(timestamp, tuple([summary(arg) for arg in args]),
+			 dict((key, summary(value)) for key, value in kwargs.items()))
+			for timestamp, args, kwargs in breadcrumbs]
+
+def _generate_breadcrumbs_view(summaries, func_name):
+	"""Generate a view of the last calls to a function, with the time relative to the last call.
+
+	:param summaries: the last calls to the function, see `_summarize_breadcrumbs`
+	:param func_name: the name of the called function
+	:rtype: str
+	"""
+	view = ['========== breadcrumbs ==========']
+	last = summaries[-1][0]
+	for timestamp, args, kwargs in summaries:
+		argsview = list(args)
+		if kwargs:
+			argsview.extend(['%s=%s' % (key, value) for key, value in kwargs.items()])
+		view.append('%+12.6fs %s(%s)' % (timestamp - last, func_name, ', '.join(argsview)))
+	view.append('=' * len(view[0]))
+	return '\n'.join(view)
+
+_DEDUP_MAGIC = b'LGXD'
+_DEDUP_HEADER = str('<4sI')
+# fingerprint hash(0 for an empty slot), duplicates since the last report, time of the last report, time last seen
+_DEDUP_SLOT = str('<QQdd')
+_DEDUP_MAX_PROBES = 16
+
+
+class SharedDeduplicator(object):
+	"""Suppress identical exception reports across processes, e.g. the workers of a prefork server.
+
+	Fingerprints(see `_exception_fingerprint()`) are kept in a fixed-size open-addressed hash table in shared memory.
+	Only the first process seeing a fingerprint within `window` seconds renders and logs the report, all other
+	processes only count the duplicate. No locks are used, so two processes seeing a new fingerprint at the very same
+	time may both report it, and the number of suppressed duplicates is approximate. The same applies to threads, so
+	the exception path of threads in a free-threaded Python does not contend for a lock. If the table is full,
+	exceptions are always reported.
+
+	Create the deduplicator in the parent process before forking the workers, or pass it to workers started with the
+	"spawn" method, which attach to the same shared memory. The shared memory is closed when a process exits and
+	removed when the creating process exits.
+
+	:param slots: the number of fingerprints the table can hold
+	:type slots: int
+	:param window: the number of seconds for which duplicates are suppressed after a report
+	:type window: float
+	:param name: the name of existing shared memory to attach to, None creates new shared memory
+	:type name: str
+	"""
+
+	def __init__(self, slots=4096, window=60.0, name=None):
+		import struct
+		from multiprocessing import shared_memory
+		self.window = window
+		self._header = header = struct.Struct(_DEDUP_HEADER)
+		self._slot = struct.Struct(_DEDUP_SLOT)
+		if name is None:
+			self._shm = shared_memory.SharedMemory(create=True, size=header.size + slots * self._slot.size)
+			header.pack_into(self._shm.buf, 0, _DEDUP_MAGIC, slots)
+			self._owner = os.getpid()
 		else:
-			return tb.tb_frame.f_code.co_name
+			# the creating process is responsible for removing the shared memory, so it must not be tracked here
+			try:
+				self._shm = shared_memory.SharedMemory(name=name, track=False)
+			except TypeError:
+				from multiprocessing import resource_tracker
+				# processes started by multiprocessing inherit the resource tracker of their parent, which is
+				# responsible anyway, every other process would remove the shared memory when exiting
+				inherited_tracker = getattr(resource_tracker._resource_tracker, '_fd', None) is not None
+				self._shm = shared_memory.SharedMemory(name=name)
+				if not inherited_tracker:
+					resource_tracker.unregister(self._shm._name, 'shared_memory')
+			magic, slots = header.unpack_from(self._shm.buf, 0)
+			if magic != _DEDUP_MAGIC:
+				self._shm.close()
+				raise ValueError('%s is not a logex deduplication table' % name)
+			self._owner = None
+		self.name = self._shm.name
+		self.slots = slots
+		self._buf = self._shm.buf
+		atexit.register(self.close)
+
+	def __reduce__(self):
+		return SharedDeduplicator, (self.slots, self.window, self.name)
+
+	def should_report(self, fingerprint):
+		"""Check if an exception should be reported, or if it was reported by any process within the window.
+
+		:param fingerprint: identifies the kind of exception, see `_exception_fingerprint()`
+		:type fingerprint: str
+		:rtype: bool
+		"""
+		import zlib
+		buf = self._buf
+		if buf is None:
+			return True
+		slot = self._slot
+		data = fingerprint.encode('utf-8')
+		key = (zlib.crc32(data) & 0xffffffff) << 32 | (zlib.adler32(data) & 0xffffffff) or 1
+		now = time.time()
+		free = None
+		index = key % self.slots
+		for i in range(min(_DEDUP_MAX_PROBES, self.slots)):
+			offset = self._header.size + index * slot.size
+			slot_key, count, reported, seen = slot.unpack_from(buf, offset)
+			if slot_key == key:
+				if now - reported < self.window:
+					slot.pack_into(buf, offset, key, count + 1, reported, now)
+					return False
+				slot.pack_into(buf, offset, key, 0, now, now)
+				return True
+			if slot_key == 0:
+				if free is None:
+					free = offset
+				break
+			if free is None and now - seen >= self.window:
+				# a stale slot can be reused, but keep looking for the fingerprint itself
+				free = offset
+			index = (index + 1) % self.slots
+		if free is not None:
+			slot.pack_into(buf, free, key, 0, now, now)
+		return True
+
+	def stats(self):
+		"""Get the number of suppressed duplicates for all fingerprints which were seen within the window.
+
+		Fingerprints are only stored as hashes, so they are identified by their hash.
+
+		:return: a dict mapping fingerprint hashes to the number of duplicates suppressed since the last report
+		:rtype: dict
+		"""
+		now = time.time()
+		stats = {}
+		for index in range(self.slots if self._buf is not None else 0):
+			key, count, reported, seen = self._slot.unpack_from(self._buf, self._header.size +
+																index * self._slot.size)
+			if key != 0 and now - seen < self.window:
+				stats[key] = count
+		return stats
+
+	def close(self):
+		"""Close the shared memory and remove it if this is the creating process."""
+		if self._buf is None:
+			return
+		self._buf = None
+		self._shm.close()
+		if self._owner == os.getpid():
+			self._shm.unlink()
+
+def _exception_fingerprint(type_, tb):
+	"""Generate a string identifying a kind of exception, i.e. the exception type and where it was raised.
+
+	:param type_: the exception type
+	:param tb: a traceback object (e.g. from sys.exc_info()[2])
+	:type tb: types.TracebackType
+	:rtype: str
+	"""
+	while tb.tb_next is not None:
+		tb = tb.tb_next
+	code = tb.tb_frame.f_code
+	return '%s.%s@%s:%s:%s' % (type_.__module__, type_.__name__, code.co_filename, code.co_name, tb.tb_lineno)
+
+def warm_up():
+	"""Import everything needed for handling exceptions.
+
+	This is done automatically when the first exception is handled. Long running processes can call this at startup,
+	so handling the first exception does not take longer than usual.
+	"""
+	global inspect
+	import inspect
+
+def _add_wrapper_code(code):
+	global _wrapper_codes
+	if code not in _wrapper_codes:
+		with _wrapper_codes_lock:
+			_wrapper_codes = _wrapper_codes | frozenset([code])
+
+def _is_wrapper_code(code, wrapper_code):
+	return code is wrapper_code or code in _wrapper_codes
+
+def _get_next_code_name(frames, wrapper_code):
+	for frame, lineno in frames:
+		if not _is_wrapper_code(frame.f_code, wrapper_code):
+			return frame.f_code.co_name
 	return '<unknown>'
 
-def _generate_source_view(tb, wrapper_code):
+def _get_traceback_frames(tb):
+	"""Get all frames of a traceback.
+
+	:param tb: a traceback object (e.g. from sys.exc_info()[2])
+	:type tb: types.TracebackType
+	:return: a list of (frame, line number) tuples, outermost frame first
+	:rtype: list
+	"""
+	frames = []
+	while tb is not None:
+		frames.append((tb.tb_frame, tb.tb_lineno))
+		tb = tb.tb_next
+	return frames
+
+def _generate_source_view(tb, wrapper_code, exc_value=None):
 	"""Generate a view showing the source code for all frames in a given traceback.
 	The view contains the following information for every frame in the traceback:
 	 * the name of the current function
@@ -81,61 +534,151 @@ def _generate_source_view(tb, wrapper_code):
 	 * an indicator "-->" for the current line of the frame
 	 * a list of locals
 
+	If `exc_value` is given, the frames of the exceptions it was caused by or raised while handling are shown, too, up
+	to `CHAIN_DEPTH` chained exceptions. Frames which are part of several tracebacks are only shown once.
+
 	:param tb: a traceback object (e.g. from sys.exc_info()[2])
 	:type tb: types.TracebackType
 	:param wrapper_code: the code object of the wrapper function, used to detect nested logex calls if not None
 	:param wrapper_code: types.CodeType or None
+	:param exc_value: the exception `tb` belongs to
+	:type exc_value: BaseException
 	:rtype: str
 	"""
 	source_view = ['========== sourcecode ==========']
-	while tb is not None:
-		crashed_frame = tb.tb_frame
+	shown = set()
+	_add_frames_view(source_view, _get_traceback_frames(tb), wrapper_code, shown)
+	seen = set([id(exc_value)])
+	while exc_value is not None:
+		if getattr(exc_value, '__cause__', None) is not None:
+			exc_value, relation = exc_value.__cause__, 'caused by'
+		elif (getattr(exc_value, '__context__', None) is not None and
+			  not getattr(exc_value, '__suppress_context__', False)):
+			exc_value, relation = exc_value.__context__, 'raised while handling'
+		else:
+			break
+		if id(exc_value) in seen:
+			break
+		if len(seen) > CHAIN_DEPTH:
+			source_view.extend(['---------- further chained exceptions are not shown ----------', ''])
+			break
+		seen.add(id(exc_value))
+		source_view.extend(['---------- %s %s ----------' % (
+			relation, traceback.format_exception_only(type(exc_value), exc_value)[-1].strip()), ''])
+		_add_frames_view(source_view, _get_traceback_frames(exc_value.__traceback__), wrapper_code, shown)
+	source_view.append('='*len(source_view[0]))
+	return '\n'.join(source_view)
+
+def _generate_frames_view(frames, wrapper_code):
+	"""Generate a view showing the source code for a list of frames, see `_generate_source_view`.
+
+	:param frames: a list of (frame, line number) tuples, outermost frame first
+	:type frames: list
+	:param wrapper_code: the code object of the wrapper function, used to detect nested logex calls if not None
+	:param wrapper_code: types.CodeType or None
+	:rtype: str
+	"""
+	source_view = ['========== sourcecode ==========']
+	_add_frames_view(source_view, frames, wrapper_code, set())
+	source_view.append('='*len(source_view[0]))
+	return '\n'.join(source_view)
+
+def _add_frames_view(source_view, frames, wrapper_code, shown):
+	"""Add the lines showing the source code for a list of frames to a source view.
+
+	Everything but the locals only depends on the code objects and line numbers of the frames, so these parts are
+	cached. Changes to the source files are therefore not reflected until the entry is evicted from the cache.
+
+	:param source_view: the lines of the source view
+	:type source_view: list
+	:param frames: a list of (frame, line number) tuples, outermost frame first
+	:type frames: list
+	:param wrapper_code: the code object of the wrapper function, used to detect nested logex calls if not None
+	:param wrapper_code: types.CodeType or None
+	:param shown: the ids of all frames which are already part of the source view, frames in this set are only
+	referred to, all other frames are added to the set
+	:type shown: set
+	"""
+	key = (wrapper_code, tuple([(frame.f_code, lineno) for frame, lineno in frames]))
+	fragments = _source_view_cache.get(key)
+	if fragments is None:
+		fragments = _generate_source_fragments(frames, wrapper_code)
+		if len(_source_view_cache) >= _SOURCE_VIEW_CACHE_SIZE:
+			try:
+				del _source_view_cache[next(iter(_source_view_cache))]
+			except (KeyError, RuntimeError, StopIteration):
+				# another thread changed the cache
+				pass
+		_source_view_cache[key] = fragments
+	frame_fragments, nested_view = fragments
+	for (frame, lineno), (code_view, locals_header) in zip(frames, frame_fragments):
+		if id(frame) in shown:
+			source_view.extend(['-- %s: %s, see above --' % (frame.f_code.co_filename, frame.f_code.co_name),
+								'%5s-->%s' % (lineno, linecache.getline(frame.f_code.co_filename, lineno).rstrip()),
+								''])
+			continue
+		shown.add(id(frame))
+		source_view.append(code_view)
+		locals_view = _generate_locals_view(frame)
+		if locals_view != '':
+			source_view.extend([locals_header, locals_view, ''])
+	if nested_view is not None:
+		source_view.append(nested_view)
+
+def _generate_source_fragments(frames, wrapper_code):
+	"""Generate the parts of a source view which do not depend on the locals.
+
+	:param frames: a list of (frame, line number) tuples, outermost frame first
+	:type frames: list
+	:param wrapper_code: the code object of the wrapper function, used to detect nested logex calls if not None
+	:param wrapper_code: types.CodeType or None
+	:return: a tuple (list of (code view, locals header) tuples for the frames up to a nested logex call, view of
+	the nested logex call or None)
+	:rtype: tuple
+	"""
+	if inspect is None:
+		warm_up()
+	frame_fragments = []
+	for index, (crashed_frame, crashed_line) in enumerate(frames):
 		if wrapper_code is not None:
-			if tb.tb_frame.f_code is wrapper_code:
-				next_code_name = _get_next_code_name(tb, wrapper_code)
-				source_view.extend(['-------------------------------------------------------',
-									'-- detected nested logex calls, see previous message --',
-									'-- for call to %-37.37s --' % (next_code_name+'()'),
-									'-------------------------------------------------------'])
-				break
-		crashed_line = crashed_frame.f_lineno
+			if _is_wrapper_code(crashed_frame.f_code, wrapper_code):
+				next_code_name = _get_next_code_name(frames[index:], wrapper_code)
+				return frame_fragments, '\n'.join([
+					'-------------------------------------------------------',
+					'-- detected nested logex calls, see previous message --',
+					'-- for call to %-37.37s --' % (next_code_name+'()'),
+					'-------------------------------------------------------'])
 		try:
 			filename = inspect.getsourcefile(crashed_frame)
 		except TypeError:
 			filename = '<UNKNOWN>'
 		file_header = '-- %s: %s --' % (filename, crashed_frame.f_code.co_name)
 		frame_line = '-'*len(file_header)
-		source_view.extend([frame_line,
-							file_header,
-							frame_line])
+		code_view = [frame_line,
+					 file_header,
+					 frame_line]
 		try:
 			sourcelines, lineno = inspect.getsourcelines(crashed_frame)
-			del crashed_frame
 		except IOError:
 			sourcelines = []
 			lineno = -1
 		last = False
 		for number, line in enumerate(sourcelines, lineno):
 			if number == crashed_line:
-				source_view.append('%5s-->%s' % (number, line[:-1]))
+				code_view.append('%5s-->%s' % (number, line[:-1]))
 				last = True
 			else:
 				if last:
-					source_view.append('...')
+					code_view.append('...')
 					break
-				source_view.append('%5s   %s' % (number, line[:-1]))
-		source_view.append('')
-		locals_view = _generate_locals_view(tb.tb_frame)
-		if locals_view != '':
-			source_view.extend(['Locals when executing line %s:' % crashed_line, locals_view, ''])
-		tb = tb.tb_next
-	source_view.append('='*len(source_view[0]))
-	return '\n'.join(source_view)
+				code_view.append('%5s   %s' % (number, line[:-1]))
+		code_view.append('')
+		frame_fragments.append(('\n'.join(code_view), 'Locals when executing line %s:' % crashed_line))
+	return frame_fragments, None
 
 def _generate_locals_view(frame):
-	arginfo = inspect.getargvalues(frame)
 	frame_locals = []
-	for item in sorted(arginfo.locals.items()):
+	for item in sorted(frame.f_locals.items()):
 		try:
 			frame_locals.append('* %s: %r' % item)
 		except Exception:
@@ -153,10 +696,9 @@ def _generate_args_view(args, kwargs):
 	:type kwargs: dict
 	:rtype: str
 	"""
-	view = ', '.join([repr(arg) for arg in args])
-	if kwargs != {}:
-		view += ', ' + ', '.join(['%s=%r' % (k, v) for k, v in kwargs.items()])
-	return view
+	view = [repr(arg) for arg in args]
+	view.extend(['%s=%r' % (k, v) for k, v in kwargs.items()])
+	return ', '.join(view)
 
 def _is_method_of(func_name, class_object):
 	"""Check if a given class object has a method of a given name.
@@ -169,9 +711,26 @@ def _is_method_of(func_name, class_object):
 	if attr is None:
 		return False
 	else:
-		return inspect.ismethod(attr)
+		return isinstance(attr, types.MethodType)
 
-def generate_log_message(template, args, kwargs, exc, wrapper_code=None, view_source=None):
+def _get_func_name(tb, args):
+	"""Get the name of the function at the top of a traceback, including the class name for methods.
+
+	:return: a tuple (function name, True if `args[0]` is the instance the method was called on)
+	:rtype: tuple
+	"""
+	func_name = tb.tb_frame.f_code.co_name
+	if len(args) > 0 and _is_method_of(func_name, args[0]):
+		return '%s.%s' % (args[0].__class__.__name__, func_name), True
+	return func_name, False
+
+def _generate_safe_source_view(tb, wrapper_code, exc_value=None):
+	try:
+		return _generate_source_view(tb, wrapper_code=wrapper_code, exc_value=exc_value)
+	except Exception:
+		return 'Error generating source view:\n%s' % traceback.format_exc()
+
+def generate_log_message(template, args, kwargs, exc, wrapper_code=None, view_source=None, breadcrumbs=None):
 	"""Generate a message based on a given template.
 
 	:param template: a template for the returned message, the following place holders will be replaced:
@@ -181,6 +740,7 @@ def generate_log_message(template, args, kwargs, exc, wrapper_code=None, view_so
 		- %(kwargs)s: the keyword arguments to the function
 		- %(argsview)s: args and kwargs in one line, separated by ', ' and kwargs in key=value form
 		- %(sourceview)s: the source code of the function
+		- %(breadcrumbs)s: the last calls to the function in the current thread(see `breadcrumbs` parameter of `log`)
 	:type template: str
 	:param args: the arguments to the top function of the traceback
 	:type args: tuple
@@ -191,58 +751,188 @@ def generate_log_message(template, args, kwargs, exc, wrapper_code=None, view_so
 	:param wrapper_code: types.CodeType or None
 	:param view_source: if True, add a view for the source code of every relevant function in the exception traceback
 	:type view_source: bool
+	:param breadcrumbs: the last calls to the function, see `_BreadcrumbTrail`
+	:type breadcrumbs: list
 	:rtype: str
 	"""
 	if view_source is None:
 		view_source = VIEW_SOURCE
 	type_, value_, tb_ = exc
-	func_name = tb_.tb_frame.f_code.co_name
+	if '%(traceback)' in template:
+		traceback_view = ''.join(traceback.format_exception(type_, value_, tb_))
+	else:
+		traceback_view = ''
 	if view_source:
-		try:
-			source = _generate_source_view(tb_, wrapper_code=wrapper_code)
-		except Exception:
-			source = 'Error generating source view:\n%s' % traceback.format_exc()
+		source = _generate_safe_source_view(tb_, wrapper_code, value_)
 	else:
 		source = ''
-	if len(args) > 0 and _is_method_of(func_name, args[0]):
-		func_name = '%s.%s' % (args[0].__class__.__name__, func_name)
-		argsview = _generate_args_view(args[1:], kwargs)
-	else:
-		argsview = _generate_args_view(args, kwargs)
+	func_name, is_method = _get_func_name(tb_, args)
+	argsview = _generate_args_view(args[1:] if is_method else args, kwargs)
 	return template % {
-		'traceback': ''.join(traceback.format_exception(type_, value_, tb_)),
+		'traceback': traceback_view,
 		'funcname': func_name,
 		'args': args,
 		'kwargs': kwargs,
 		'argsview': argsview,
-		'sourceview': source
+		'sourceview': source,
+		'breadcrumbs': _generate_breadcrumbs_view(_summarize_breadcrumbs(breadcrumbs), func_name) if breadcrumbs else ''
 	}
 
+class _LazyText(object):
+	"""A string which is only rendered when it is converted with str() for the first time."""
+	__slots__ = ('_render', '_text')
+
+	def __init__(self, render):
+		self._render = render
+		self._text = None
+
+	def __str__(self):
+		text = self._text
+		if text is None:
+			render = self._render
+			if render is None:
+				# another thread rendered the text in the meantime
+				return self._text
+			text = self._text = render()
+			self._render = None
+		return text
+
+	__unicode__ = __str__
+
+	def __reduce__(self):
+		return str, (str(self),)
+
+
+class LogexFormatter(logging.Formatter):
+	"""A Formatter for records emitted by logex in logger mode(see the `logger` parameter of `log()`).
+
+	The message of such a record is a short summary, so handlers with other formatters only show the summary and the
+	traceback. This formatter uses the message rendered from the template instead, including the source view and the
+	breadcrumbs if the template contains them. As the template contains the traceback if it is wanted, this formatter
+	does not append the traceback again.
+	The structured data is available to the format string as %(logex_funcname)s, %(logex_argsview)s,
+	%(logex_traceback)s, %(logex_sourceview)s and %(logex_breadcrumbsview)s. The last calls themselves are available as
+	logex_breadcrumbs, a list of (timestamp, args, kwargs) tuples with summaries of the arguments as strings.
+	"""
+
+	def format(self, record):
+		message = getattr(record, 'logex_message', None)
+		if message is None:
+			return logging.Formatter.format(self, record)
+		msg, args, exc_info, exc_text = record.msg, record.args, record.exc_info, record.exc_text
+		record.msg, record.args = message, ()
+		record.exc_info = record.exc_text = None
+		try:
+			return logging.Formatter.format(self, record)
+		finally:
+			record.msg, record.args, record.exc_info, record.exc_text = msg, args, exc_info, exc_text
+
+# logger name -> logger, loggers are never removed from the logging module, so they can be cached forever
+_loggers = {}
+
+def _get_logger(logger):
+	"""Get a logger by name, loggers and None are returned unchanged.
+
+	Unlike logging.getLogger(), this does not take the lock of the logging module for known names.
+	"""
+	if logger is None or isinstance(logger, logging.Logger):
+		return logger
+	cached = _loggers.get(logger)
+	if cached is None:
+		cached = _loggers[logger] = logging.getLogger(logger)
+	return cached
+
+def _log_internal_error():
+	"""Log an error of logex itself, configuring the logging module first if nobody did."""
+	if not logging.root.handlers:
+		# basicConfig() takes the lock of the logging module on every call, even if there is nothing to do
+		logging.basicConfig()
+	_logger.exception('Error while generating log message for unhandled exception:')
+
+def _make_log_record(logger, level, template, args, kwargs, exc, wrapper_code, view_source, breadcrumbs):
+	"""Create a LogRecord for an exception without rendering anything but the function name.
+
+	The message of the record only names the function and its arguments, the message rendered from the template is the
+	structured field logex_message, see `LogexFormatter`. It is rendered lazily, just like the structured fields
+	logex_argsview, logex_traceback, logex_sourceview and logex_breadcrumbsview.
+	Note that the source view shows the locals at the time the record is formatted.
+
+	:rtype: logging.LogRecord
+	"""
+	type_, value_, tb_ = exc
+	func_name, is_method = _get_func_name(tb_, args)
+	argsview = _LazyText(lambda: _generate_args_view(args[1:] if is_method else args, kwargs))
+	traceback_view = _LazyText(lambda: ''.join(traceback.format_exception(type_, value_, tb_)))
+	if view_source:
+		source = _LazyText(lambda: _generate_safe_source_view(tb_, wrapper_code, value_))
+	else:
+		source = ''
+	if breadcrumbs:
+		# the raw breadcrumbs reference the arguments, which might neither be picklable nor thread-safe to format later
+		breadcrumbs = _summarize_breadcrumbs(breadcrumbs)
+		breadcrumbs_view = _LazyText(lambda: _generate_breadcrumbs_view(breadcrumbs, func_name))
+	else:
+		breadcrumbs_view = ''
+	message = _LazyText(lambda: template % {
+		'traceback': traceback_view,
+		'funcname': func_name,
+		'args': args,
+		'kwargs': kwargs,
+		'argsview': argsview,
+		'sourceview': source,
+		'breadcrumbs': breadcrumbs_view
+	})
+	code = tb_.tb_frame.f_code
+	return logger.makeRecord(logger.name, level, code.co_filename, tb_.tb_lineno,
+							 'Unhandled exception calling %s(%s)', (func_name, argsview), exc, code.co_name,
+							 {'logex_message': message, 'logex_funcname': func_name, 'logex_argsview': argsview,
+							  'logex_traceback': traceback_view, 'logex_sourceview': source,
+							  'logex_breadcrumbs': breadcrumbs or [], 'logex_breadcrumbsview': breadcrumbs_view})
+
 def _handle_log_exception(args, kwargs, logfunction, lazy, advanced,
 						  template, view_source, reraise,
-						  wrapper_code=None, strip=1, exc=None):
+						  wrapper_code=None, strip=1, exc=None, logger=None, level=logging.ERROR, policies=None,
+						  breadcrumbs=None, dedup=None):
 	# noinspection PyBroadException
 	try:
-		logf = logfunction() if lazy else logfunction
 		if exc is None:
 			type_, value_, tb_ = sys.exc_info()
 		else:
 			type_, value_, tb_ = exc
+		policy = policies.lookup(type_) if policies is not None else None
+		if policy is not None:
+			# an exception given by the caller, e.g. by excepthook, is not being handled, so it cannot be re-raised
+			if policy.reraise is not None and exc is None: reraise = policy.reraise
+			if policy.view_source is not None: view_source = policy.view_source
+			if policy.template is not None: template = policy.template
+			if policy.level is not None: level = policy.level
 		for i in range(strip):
 			if tb_.tb_next is None:
 				break
 			tb_ = tb_.tb_next
-		if advanced:
-			logf(template, args, kwargs, (type_, value_, tb_), wrapper_code=wrapper_code,
-				 view_source=view_source)
+		if dedup is not None and not dedup.should_report(_exception_fingerprint(type_, tb_)):
+			# the same exception was reported recently, maybe by another process
+			pass
+		elif logger is not None:
+			if logger.isEnabledFor(level):
+				logger.handle(_make_log_record(logger, level, template, args, kwargs, (type_, value_, tb_),
+											   wrapper_code, view_source, breadcrumbs))
+		elif advanced:
+			logf = logfunction() if lazy else logfunction
+			if breadcrumbs is None:
+				logf(template, args, kwargs, (type_, value_, tb_), wrapper_code=wrapper_code,
+					 view_source=view_source)
+			else:
+				logf(template, args, kwargs, (type_, value_, tb_), wrapper_code=wrapper_code,
+					 view_source=view_source, breadcrumbs=breadcrumbs)
 		else:
+			logf = logfunction() if lazy else logfunction
 			message = generate_log_message(
 				template, args, kwargs, (type_, value_, tb_), wrapper_code=wrapper_code,
-				view_source=view_source)
+				view_source=view_source, breadcrumbs=breadcrumbs)
 			logf(message)
 	except Exception:
-		logging.basicConfig()
-		_logger.exception('Error while generating log message for unhandled exception:')
+		_log_internal_error()
 	finally:
 		try:
 				# noinspection PyUnboundLocalVariable
@@ -253,8 +943,247 @@ def _handle_log_exception(args, kwargs, logfunction, lazy, advanced,
 		# noinspection PyCompatibility
 		raise
 
+_watchdog_local = threading.local()
+# thread ident -> list of running calls of that thread, see `_Watch`
+_watchdog_threads = {}
+_watchdog_lock = threading.Lock()
+_watchdog_interval = 1.0
+# the id of the process in which the watchdog thread is running, threads do not survive a fork
+_watchdog_pid = None
+
+
+class _Watch(object):
+	"""The watchdog settings for a decorated function.
+
+	Every running call of a watched function is tracked in a list of its thread as
+	[start time, wrapper frame, watch, args, kwargs, reported].
+	"""
+
+	def __init__(self, func_name, threshold, logfunction, lazy, advanced, view_source, logger, level):
+		self.func_name = func_name
+		self.threshold = threshold
+		self.logfunction = logfunction
+		self.lazy = lazy
+		self.advanced = advanced
+		self.view_source = view_source
+		self.logger = logger
+		self.level = level
+
+	def report(self, call, frames, elapsed, thread_name):
+		"""Log a call which is running for too long.
+
+		:param call: the tracked call, see `_Watch`
+		:param frames: the live stack of the call, a list of (frame, line number) tuples, outermost frame first
+		:param elapsed: the number of seconds the call is running
+		:param thread_name: the name of the thread executing the call
+		"""
+		args, kwargs = call[3], call[4]
+		func_name = self.func_name
+		if len(args) > 0 and _is_method_of(func_name, args[0]):
+			func_name = '%s.%s' % (args[0].__class__.__name__, func_name)
+			args = args[1:]
+		stack = [(frame.f_code.co_filename, lineno, frame.f_code.co_name,
+				  linecache.getline(frame.f_code.co_filename, lineno).strip()) for frame, lineno in frames]
+		message = 'Call to %s(%s) in thread %s is running for %.1f seconds:\n%s\n%s' % (
+			func_name, _generate_args_view(args, kwargs), thread_name, elapsed,
+			''.join(traceback.format_list(stack)),
+			_generate_frames_view(frames, None) if self.view_source else '')
+		if self.logger is not None:
+			self.logger.log(self.level, message)
+		elif self.advanced:
+			# an advanced logfunction expects an exception, see the `watchdog` parameter of `log()`
+			_logger.warning(message)
+		else:
+			logf = self.logfunction() if self.lazy else self.logfunction
+			logf(message)
+
+def _register_watchdog_thread():
+	"""Create the list of running watched calls for the current thread.
+
+	This also starts the watchdog thread in processes forked after the decoration.
+	"""
+	running = _watchdog_local.running = []
+	with _watchdog_lock:
+		_watchdog_threads[threading.current_thread().ident] = running
+		_start_watchdog_thread()
+	return running
+
+def _start_watchdog(threshold):
+	"""Start the watchdog thread if it is not running, and make sure it checks often enough for `threshold`."""
+	global _watchdog_interval
+	with _watchdog_lock:
+		_watchdog_interval = min(_watchdog_interval, max(threshold / 4.0, 0.01))
+		_start_watchdog_thread()
+
+def _start_watchdog_thread():
+	"""Start the watchdog thread if it is not running in the current process, `_watchdog_lock` must be held."""
+	global _watchdog_pid
+	pid = os.getpid()
+	if _watchdog_pid != pid:
+		thread = threading.Thread(target=_run_watchdog, name='logex.watchdog')
+		thread.daemon = True
+		thread.start()
+		_watchdog_pid = pid
+
+def _reset_watchdog_after_fork():
+	"""Forget the watched calls of the parent process, the first watched call in the child starts the watchdog."""
+	global _watchdog_lock, _watchdog_threads
+	_watchdog_lock = threading.Lock()
+	_watchdog_threads = {}
+	try:
+		del _watchdog_local.running
+	except AttributeError:
+		pass
+
+if hasattr(os, 'register_at_fork'):
+	os.register_at_fork(after_in_child=_reset_watchdog_after_fork)
+
+def _run_watchdog():
+	while True:
+		time.sleep(_watchdog_interval)
+		# noinspection PyBroadException
+		try:
+			_check_watched_calls()
+		except Exception:
+			_logger.exception('Error while checking for slow calls:')
+
+def _check_watched_calls():
+	"""Report all calls running for too long which have not been reported yet.
+
+	Only the outermost of several nested calls in a thread is reported, its stack includes the others.
+	"""
+	now = _clock()
+	current_frames = sys._current_frames()
+	with _watchdog_lock:
+		threads = list(_watchdog_threads.items())
+		for ident, running in threads:
+			if not running and ident not in current_frames:
+				del _watchdog_threads[ident]
+	thread_names = None
+	for ident, running in threads:
+		overdue = [call for call in list(running) if now - call[0] >= call[2].threshold]
+		unreported = [call for call in overdue if not call[5]]
+		if not unreported:
+			continue
+		for call in overdue:
+			call[5] = True
+		call = unreported[0]
+		frame = current_frames.get(ident)
+		frames = []
+		while frame is not None and frame is not call[1]:
+			frames.append((frame, frame.f_lineno))
+			frame = frame.f_back
+		if frame is None:
+			# the call returned in the meantime
+			continue
+		frames.reverse()
+		if thread_names is None:
+			thread_names = dict((thread.ident, thread.name) for thread in threading.enumerate())
+		call[2].report(call, frames, now - call[0], thread_names.get(ident, ident))
+
+def _specialized_wrapper_factory(wrapped_f):
+	"""Get a factory for a wrapper function with the same parameter list as a given function.
+
+	The factory is called with the wrapped function, the exception types to catch, an error handler, a dict of keyword
+	arguments for the error handler and all default values of the wrapped function. If an exception is caught, the
+	error handler is called with an args tuple, a kwargs dict and the keyword arguments.
+	Factories are compiled once per signature shape, i.e. the names and kinds of parameters and which of them have a
+	default value.
+
+	:param wrapped_f: the function to be wrapped
+	:return: a tuple (factory, defaults) or None if the signature of `wrapped_f` cannot be reproduced
+	"""
+	import inspect
+	import keyword
+	try:
+		# decorators using functools.wraps may change the parameters, so use the signature of the callable itself
+		parameters = inspect.signature(wrapped_f, follow_wrapped=False).parameters.values()
+	except (AttributeError, TypeError, ValueError):
+		return None
+	shape = []
+	defaults = []
+	for parameter in parameters:
+		if (parameter.name.startswith('_logex_') or keyword.iskeyword(parameter.name)
+				or not parameter.name.isidentifier()):
+			return None
+		if parameter.kind is parameter.POSITIONAL_ONLY and sys.version_info < (3, 8):
+			# positional-only parameters can only be declared with '/' since Python 3.8
+			return None
+		has_default = parameter.default is not parameter.empty
+		if has_default:
+			defaults.append(parameter.default)
+		shape.append((parameter.name, parameter.kind, has_default))
+	shape = tuple(shape)
+	factory = _specialized_factories.get(shape)
+	if factory is None:
+		factory = _specialized_factories[shape] = _compile_specialized_wrapper_factory(shape)
+	return factory, defaults
+
+def _compile_specialized_wrapper_factory(shape):
+	import inspect
+	kinds = inspect.Parameter
+	params = []
+	call_args = []
+	args = []
+	var_args = None
+	kwargs = []
+	var_kwargs = None
+	defaults = []
+	for index, (name, kind, has_default) in enumerate(shape):
+		if kind is kinds.KEYWORD_ONLY and var_args is None and '*' not in params:
+			params.append('*')
+		if has_default:
+			defaults.append('_logex_d%d' % len(defaults))
+			params.append('%s=%s' % (name, defaults[-1]))
+		else:
+			params.append(name)
+		if kind is kinds.POSITIONAL_ONLY or kind is kinds.POSITIONAL_OR_KEYWORD:
+			call_args.append(name)
+			args.append(name)
+		elif kind is kinds.VAR_POSITIONAL:
+			params[-1] = '*' + name
+			call_args.append('*' + name)
+			var_args = name
+		elif kind is kinds.KEYWORD_ONLY:
+			call_args.append('%s=%s' % (name, name))
+			kwargs.append('%r: %s' % (name, name))
+		else:
+			params[-1] = '**' + name
+			call_args.append('**' + name)
+			var_kwargs = name
+		if kind is kinds.POSITIONAL_ONLY and (index + 1 == len(shape) or
+											  shape[index + 1][1] is not kinds.POSITIONAL_ONLY):
+			params.append('/')
+	args = '(%s)' % ''.join('%s, ' % name for name in args)
+	if var_args is not None:
+		args = '%s + %s' % (args, var_args)
+	kwargs = '{%s}' % ', '.join(kwargs)
+	if var_kwargs is not None:
+		kwargs = '_logex_dict(%s, **%s)' % (kwargs, var_kwargs)
+	filename = '<logex wrapper %d>' % len(_specialized_factories)
+	# builtins are passed as _logex_ arguments, the parameters of the wrapped function might shadow them
+	source = ('def factory(_logex_f, _logex_catch, _logex_error, _logex_options%(defaults)s, _logex_dict=dict):\n'
+			  '\tdef wrapper_f(%(params)s):\n'
+			  '\t\ttry:\n'
+			  '\t\t\treturn _logex_f(%(call_args)s)\n'
+			  '\t\texcept _logex_catch:\n'
+			  '\t\t\t_logex_error(%(args)s, %(kwargs)s, **_logex_options)\n'
+			  '\treturn wrapper_f\n') % {
+		'defaults': ''.join(', ' + default for default in defaults),
+		'params': ', '.join(params),
+		'call_args': ', '.join(call_args),
+		'args': args,
+		'kwargs': kwargs,
+	}
+	namespace = {}
+	exec(compile(source, filename, 'exec'), namespace)
+	# make the source available for tracebacks and source views
+	linecache.cache[filename] = (len(source), None, source.splitlines(True), filename)
+	return namespace['factory']
+
 def log(wrapped_f=None, logfunction=None, lazy=None, advanced=None, template=None,
-		reraise=None, catchall=None, view_source=None, detect_nested=None):
+		reraise=None, catchall=None, view_source=None, detect_nested=None, breaker=None, specialize=None,
+		logger=None, level=None, policies=None, breadcrumbs=None, dedup=None, watchdog=None):
 	"""Decorator function that logs all unhandled exceptions in a function.
 	This is especially useful for thread functions in a daemon or functions which are used as D-Bus signal handlers.
 
@@ -281,6 +1210,35 @@ def log(wrapped_f=None, logfunction=None, lazy=None, advanced=None, template=Non
 	:param detect_nested: if False, do not try to detect wrapped logex calls, i.e. if a method decorated by this
 	function calls another method decorated by this function
 	:type detect_nested: bool
+	:param breaker: a `CircuitBreaker` or a dict of keyword arguments for a new `CircuitBreaker`, which makes the
+	decorated function fail fast while it keeps failing, None disables the circuit breaker
+	:type breaker: CircuitBreaker or dict
+	:param specialize: if True, generate a wrapper with the same parameter list as the decorated function, which avoids
+	packing and unpacking *args/**kwargs for every call. Arguments are then passed to the log function as positional
+	arguments, except for keyword-only arguments. The generic wrapper is used for signatures which cannot be reproduced
+	and if `breaker`, `breadcrumbs` or `watchdog` is used.
+	:type specialize: bool
+	:param logger: a logging.Logger or the name of a logger to pass a LogRecord to instead of calling `logfunction`.
+	Nothing is rendered if the logger is not enabled for `level`. The message of the record only names the function and
+	its arguments, the message generated from `template` is only rendered if a `LogexFormatter` formats the record.
+	:type logger: logging.Logger or str
+	:param level: the log level used with `logger`
+	:type level: int
+	:param policies: a `PolicyTable` or a dict mapping exception classes to a `Policy`, which overrides `view_source`,
+	`level`, `template` and `reraise` for exceptions of these classes and their subclasses
+	:type policies: PolicyTable or dict
+	:param breadcrumbs: the number of calls to the decorated function to remember per thread, which are shown for the
+	%(breadcrumbs)s place holder(see `generate_log_message`), 0 disables recording calls. Note that the arguments of
+	these calls are kept alive until they are replaced by later calls.
+	:type breadcrumbs: int
+	:param dedup: a `SharedDeduplicator` which suppresses reports of exceptions that were already reported by another
+	process recently
+	:type dedup: SharedDeduplicator
+	:param watchdog: if greater than 0, log the live stack of calls to the decorated function which are running for
+	more than this many seconds, once per call, 0 disables the watchdog. The report is passed to `logger` or
+	`logfunction` like the message for an exception. An advanced logfunction expects an exception, so if `advanced` is
+	True, the report is logged as a warning to the "logex" logger instead.
+	:type watchdog: float
 	"""
 	if logfunction is None: logfunction = LOGFUNCTION
 	if lazy is None: lazy = LAZY
@@ -290,41 +1248,93 @@ def log(wrapped_f=None, logfunction=None, lazy=None, advanced=None, template=Non
 	if catchall is None: catchall = CATCHALL
 	if view_source is None: view_source = VIEW_SOURCE
 	if detect_nested is None: detect_nested = DETECT_NESTED
+	if breaker is None: breaker = BREAKER
+	if specialize is None: specialize = SPECIALIZE
+	if logger is None: logger = LOGGER
+	if level is None: level = LEVEL
+	if policies is None: policies = POLICIES
+	if breadcrumbs is None: breadcrumbs = BREADCRUMBS
+	if dedup is None: dedup = DEDUP
+	if watchdog is None: watchdog = WATCHDOG
 	if wrapped_f is not None:
-		if catchall:
+		catch = BaseException if catchall else Exception
+		logger = _get_logger(logger)
+		policies = _get_policy_table(policies)
+
+		if breadcrumbs:
+			trails = threading.local()
+		else:
+			trails = None
+
+		# the arguments for _handle_log_exception, wrapper_code is added once the wrapper exists. The wrappers call
+		# _handle_log_exception directly, so there is no frame between nested wrappers(see `_get_next_code_name`).
+		options = dict(logfunction=logfunction, lazy=lazy, advanced=advanced, template=template,
+					   view_source=view_source, reraise=reraise, logger=logger, level=level, policies=policies,
+					   dedup=dedup)
+
+		if breaker is not None:
+			if isinstance(breaker, dict):
+				breaker = CircuitBreaker(**breaker)
+			if breaker.name is None:
+				breaker.name = getattr(wrapped_f, '__name__', repr(wrapped_f))
+		if watchdog:
+			watch = _Watch(getattr(wrapped_f, '__name__', repr(wrapped_f)), watchdog, logfunction, lazy, advanced,
+						   view_source, logger, level)
+			_start_watchdog(watchdog)
+		else:
+			watch = None
+		specialized = None
+		if specialize and breaker is None and trails is None and watch is None:
+			specialized = _specialized_wrapper_factory(wrapped_f)
+		if specialized is not None:
+			factory, defaults = specialized
+			wrapper_f = factory(wrapped_f, catch, _handle_log_exception, options, *defaults)
+		elif breaker is None and trails is None and watch is None:
 			# noinspection PyBroadException,PyDocstring
 			def wrapper_f(*args, **kwargs):
 				try:
 					return wrapped_f(*args, **kwargs)
-				except:
-					if detect_nested:
-						try:
-							# noinspection PyUnresolvedReferences
-							wrapper_code = wrapper_f.func_code
-						except AttributeError:
-							# noinspection PyUnresolvedReferences
-							wrapper_code = wrapper_f.__code__
-					else:
-						wrapper_code = None
-					_handle_log_exception(args, kwargs, logfunction, lazy, advanced,
-										  template, view_source, reraise, wrapper_code=wrapper_code)
+				except catch:
+					_handle_log_exception(args, kwargs, **options)
 		else:
+			closed = CircuitBreaker.CLOSED
+
 			# noinspection PyBroadException,PyDocstring
 			def wrapper_f(*args, **kwargs):
+				if trails is not None:
+					try:
+						trail = trails.trail
+					except AttributeError:
+						trail = trails.trail = _BreadcrumbTrail(breadcrumbs)
+					index = trail.index
+					trail.entries[index] = (_clock(), args, kwargs)
+					trail.index = index + 1 if index + 1 < breadcrumbs else 0
+				if breaker is not None and breaker.state is not closed and not breaker.allow():
+					return breaker.reject()
+				if watch is not None:
+					try:
+						running = _watchdog_local.running
+					except AttributeError:
+						running = _register_watchdog_thread()
+					running.append([_clock(), sys._getframe(), watch, args, kwargs, False])
 				try:
-					return wrapped_f(*args, **kwargs)
-				except Exception:
-					if detect_nested:
-						try:
-							# noinspection PyUnresolvedReferences
-							wrapper_code = wrapper_f.func_code
-						except AttributeError:
-							# noinspection PyUnresolvedReferences
-							wrapper_code = wrapper_f.__code__
-					else:
-						wrapper_code = None
-					_handle_log_exception(args, kwargs, logfunction, lazy, advanced,
-										  template, view_source, reraise, wrapper_code=wrapper_code)
+					result = wrapped_f(*args, **kwargs)
+				except catch:
+					if breaker is not None:
+						type_, value_, tb_ = sys.exc_info()
+						breaker.failure(_exception_fingerprint(type_, tb_))
+						del type_, value_, tb_
+					_handle_log_exception(args, kwargs, **dict(
+						options, breadcrumbs=trails.trail.snapshot() if trails is not None else None))
+				else:
+					if breaker is not None and breaker.state is not closed:
+						breaker.success()
+					return result
+				finally:
+					if watch is not None:
+						running.pop()
+		options['wrapper_code'] = wrapper_f.__code__ if detect_nested else None
+		_add_wrapper_code(wrapper_f.__code__)
 		return functools.update_wrapper(wrapper_f, wrapped_f)
 	else:
 		# noinspection PyDocstring
@@ -332,14 +1342,21 @@ def log(wrapped_f=None, logfunction=None, lazy=None, advanced=None, template=Non
 			return log(wrapped_fn,
 					   logfunction=logfunction, lazy=lazy, advanced=advanced,
 					   template=template, reraise=reraise, catchall=catchall,
-					   view_source=view_source, detect_nested=detect_nested)
+					   view_source=view_source, detect_nested=detect_nested,
+					   breaker=breaker, specialize=specialize, logger=logger, level=level,
+					   policies=policies, breadcrumbs=breadcrumbs, dedup=dedup, watchdog=watchdog)
 		return arg_wrapper
 
 def excepthook(type_, value_, traceback_):
-	"""A wrapper that can be used as sys.excepthook."""
+	"""A wrapper that can be used as sys.excepthook.
+
+	The module variables are read when the exception is handled, `CHAIN_DEPTH` when the source view is rendered.
+	Changing them from another thread at the same time is safe, the report uses either the old or the new value.
+	"""
 	_handle_log_exception((), {}, LOGFUNCTION, LAZY, ADVANCED,
 							TEMPLATE, VIEW_SOURCE, False,
-							exc=(type_, value_, traceback_))
+							exc=(type_, value_, traceback_), logger=_get_logger(LOGGER), level=LEVEL,
+							policies=_get_policy_table(POLICIES), dedup=DEDUP)
 
 def install_excepthook():
 	"""Set the global excepthook which is called if an unhandled exception is raised in the main thread."""
@@ -348,3 +1365,403 @@ def install_excepthook():
 def uninstall_excepthook():
 	"""Restore the original excepthook."""
 	sys.excepthook = sys.__excepthook__
+
+
+_LoggingFuture = None
+
+def _define_executor_classes():
+	"""Define the classes based on concurrent.futures, which is only imported when they are needed."""
+	global _LoggingFuture, LoggingExecutor
+	from concurrent import futures
+
+	class _LoggingFuture(futures.Future):
+		"""A Future which remembers if its result or exception was retrieved and reports unretrieved exceptions.
+
+		`instrument()` creates a subclass with a `_logex_report` function per executor and changes the class of the
+		futures created by the executor to this subclass.
+		"""
+		_logex_retrieved = False
+		_logex_report = None
+
+		def result(self, timeout=None):
+			self._logex_retrieved = True
+			return futures.Future.result(self, timeout)
+
+		def exception(self, timeout=None):
+			self._logex_retrieved = True
+			return futures.Future.exception(self, timeout)
+
+		def __del__(self):
+			# the exception of a cancelled future is None, too
+			if not self._logex_retrieved and self._exception is not None and self._logex_report is not None:
+				self._logex_report(self)
+
+	class LoggingExecutor(futures.ThreadPoolExecutor):
+		"""A ThreadPoolExecutor which logs exceptions raised by tasks which nobody retrieves.
+
+		Takes the same parameters as ThreadPoolExecutor and `instrument()`.
+		"""
+
+		def __init__(self, *args, **kwargs):
+			parameters = dict((name, kwargs.pop(name)) for name in _INSTRUMENT_PARAMETERS if name in kwargs)
+			futures.ThreadPoolExecutor.__init__(self, *args, **kwargs)
+			instrument(self, **parameters)
+	_LoggingFuture.__qualname__ = str('_LoggingFuture')
+	LoggingExecutor.__qualname__ = str('LoggingExecutor')
+
+def __getattr__(name):
+	# LoggingExecutor is only defined when it is used the first time(PEP 562)
+	if name == 'LoggingExecutor':
+		_define_executor_classes()
+		return LoggingExecutor
+	raise AttributeError('module %r has no attribute %r' % (__name__, name))
+
+
+def instrument(executor, logfunction=None, lazy=None, advanced=None, template=None, view_source=None,
+			   logger=None, level=None, policies=None, dedup=None, report_on='gc'):
+	"""Log exceptions raised by tasks of an executor(e.g. concurrent.futures.ThreadPoolExecutor) which nobody retrieves.
+
+	This is much cheaper than decorating every submitted function with `log()`: the futures created by the executor
+	only get another class, or, with `report_on` set to 'done', a shared done callback.
+
+	The parameters are the same as for `log()`, exceptions are never re-raised.
+
+	:param executor: the executor, its submit method is replaced
+	:type executor: concurrent.futures.Executor
+	:param report_on: 'gc' to log an exception when its future is garbage collected and neither result() nor
+	exception() has been called, 'done' to log every exception as soon as the task is done
+	:type report_on: str
+	:return: `executor`
+	"""
+	if report_on not in ('gc', 'done'):
+		raise ValueError('unknown report_on: %r' % (report_on,))
+	if _LoggingFuture is None:
+		_define_executor_classes()
+	if logfunction is None: logfunction = LOGFUNCTION
+	if lazy is None: lazy = LAZY
+	if advanced is None: advanced = ADVANCED
+	if template is None: template = TEMPLATE
+	if view_source is None: view_source = VIEW_SOURCE
+	if logger is None: logger = LOGGER
+	if level is None: level = LEVEL
+	if policies is None: policies = POLICIES
+	if dedup is None: dedup = DEDUP
+	logger = _get_logger(logger)
+	policies = _get_policy_table(policies)
+
+	# noinspection PyDocstring
+	def report(future):
+		exc = future._exception
+		args, kwargs = future._logex_call
+		if getattr(exc, '__traceback__', None) is None:
+			# e.g. exceptions of a ProcessPoolExecutor, which only carry the remote traceback as text
+			_logger.error('Unhandled exception in task %s:', future, exc_info=(type(exc), exc, None))
+			return
+		# the default strip removes the executor's frame which called the task
+		_handle_log_exception(args, kwargs, logfunction, lazy, advanced, template, view_source, False,
+							  exc=(type(exc), exc, exc.__traceback__), logger=logger, level=level,
+							  policies=policies, dedup=dedup)
+	submit = executor.submit
+	if report_on == 'gc':
+		future_class = type(str('LoggingFuture'), (_LoggingFuture,), {'_logex_report': staticmethod(report)})
+
+		# noinspection PyDocstring
+		def logging_submit(*args, **kwargs):
+			future = submit(*args, **kwargs)
+			future.__class__ = future_class
+			future._logex_call = (args[1:], kwargs)
+			return future
+	else:
+		# noinspection PyDocstring
+		def done_callback(future):
+			if not future.cancelled() and future._exception is not None:
+				report(future)
+
+		# noinspection PyDocstring
+		def logging_submit(*args, **kwargs):
+			future = submit(*args, **kwargs)
+			future._logex_call = (args[1:], kwargs)
+			future.add_done_callback(done_callback)
+			return future
+	executor.submit = functools.update_wrapper(logging_submit, submit)
+	return executor
+
+_INSTRUMENT_PARAMETERS = ('logfunction', 'lazy', 'advanced', 'template', 'view_source', 'logger', 'level', 'policies',
+						  'dedup', 'report_on')
+
+if sys.version_info < (3, 7):
+	# module level __getattr__ is not supported
+	try:
+		_define_executor_classes()
+	except ImportError:
+		pass
+
+
+_SINK_MAGIC = b'LGXB'
+_SINK_BLOCK_HEADER = str('>4sBI')
+_SINK_RECORD_HEADER = str('>I')
+_SINK_CODECS = {None: 0, 'zlib': 1, 'gzip': 2}
+
+
+class FileSink(object):
+	"""A log function writing messages to a file in batches, optionally compressed and rotated by size.
+
+	Messages are buffered and written as one block as soon as `flush_size` bytes are pending or `flush_interval`
+	seconds have passed. Every block is compressed on its own, so a file stays readable up to the last complete block
+	even if the process dies. Use `read_sink()` to read the messages back.
+
+	An instance can be used as logfunction, in which case it is called with the generated message, or as an advanced
+	logfunction, in which case the message is generated via `generate_log_message()`:
+
+	>>> logex.LOGFUNCTION = logex.FileSink('/var/log/mydaemon/exceptions.lgx', compression='zlib')
+
+	:param filename: the file to write to
+	:type filename: str
+	:param compression: None, 'zlib' or 'gzip'
+	:type compression: str
+	:param compression_level: the compression level from 1(fast) to 9(small)
+	:type compression_level: int
+	:param flush_size: write pending messages as soon as they amount to this many bytes
+	:type flush_size: int
+	:param flush_interval: write pending messages after this many seconds, 0 disables flushing in the background
+	:type flush_interval: float
+	:param max_bytes: rotate the file before it would grow beyond this size, 0 disables rotation
+	:type max_bytes: int
+	:param backup_count: the number of rotated files to keep(`filename`.1 being the newest)
+	:type backup_count: int
+	:param fsync: 'never' to leave syncing to the OS, 'rotate' to sync before closing a file(i.e. on rotation and
+	close) or 'flush' to sync after every written block
+	:type fsync: str
+	"""
+
+	def __init__(self, filename, compression=None, compression_level=6, flush_size=64 * 1024, flush_interval=5.0,
+				 max_bytes=0, backup_count=5, fsync='never'):
+		if compression not in _SINK_CODECS:
+			raise ValueError('unknown compression: %r' % (compression,))
+		if fsync not in ('never', 'rotate', 'flush'):
+			raise ValueError('unknown fsync policy: %r' % (fsync,))
+		import struct
+		self._block_header = struct.Struct(_SINK_BLOCK_HEADER)
+		self._record_header = struct.Struct(_SINK_RECORD_HEADER)
+		self.filename = os.path.abspath(filename)
+		self.compression = compression
+		self.compression_level = compression_level
+		self.flush_size = flush_size
+		self.flush_interval = flush_interval
+		self.max_bytes = max_bytes
+		self.backup_count = backup_count
+		self.fsync = fsync
+		self._pending = []
+		self._pending_size = 0
+		self._stream = None
+		self._file_size = 0
+		self._closed = False
+		self._flusher = None
+		self._wakeup = threading.Event()
+		self._lock = threading.RLock()
+		# only weak references are registered, so sinks which are no longer used are closed by __del__
+		ref = weakref.ref(self)
+		atexit.register(_call_sink, ref, 'close')
+		if hasattr(os, 'register_at_fork'):
+			os.register_at_fork(after_in_child=functools.partial(_call_sink, ref, '_reset_after_fork'))
+
+	def __call__(self, message, *args, **kwargs):
+		if args:
+			message = generate_log_message(message, *args, **kwargs)
+		self.write(message)
+
+	def write(self, message):
+		"""Add a message to the buffer and write the buffer if it is full.
+
+		:type message: str
+		"""
+		record = message.encode('utf-8')
+		with self._lock:
+			self._pending.append(self._record_header.pack(len(record)))
+			self._pending.append(record)
+			self._pending_size += self._record_header.size + len(record)
+			if self._closed:
+				# e.g. a message logged by another atexit function, write it right away and close the file again
+				self._flush()
+				if self._stream is not None:
+					self._close_stream()
+			elif self._pending_size >= self.flush_size:
+				self._flush()
+			elif self._flusher is None and self.flush_interval:
+				self._flusher = threading.Thread(target=self._run_flusher, name='logex.FileSink',
+												 args=(weakref.ref(self), self._wakeup, self.flush_interval))
+				self._flusher.daemon = True
+				self._flusher.start()
+
+	def flush(self):
+		"""Write all pending messages."""
+		with self._lock:
+			self._flush()
+
+	def close(self):
+		"""Write all pending messages and close the file.
+
+		Messages written after closing are written right away, opening and closing the file for every message.
+		"""
+		with self._lock:
+			self._closed = True
+			self._wakeup.set()
+			self._flush()
+			if self._stream is not None:
+				self._close_stream()
+
+	def _reset_after_fork(self):
+		"""Drop the messages of the parent process, they are written by the parent, and forget its flusher thread."""
+		self._lock = threading.RLock()
+		self._wakeup = threading.Event()
+		self._pending = []
+		self._pending_size = 0
+		self._flusher = None
+		# the child writes to its own file descriptor, reopening also updates the file size
+		self._stream = None
+
+	def __del__(self):
+		# noinspection PyBroadException
+		try:
+			self.close()
+		except Exception:
+			pass
+
+	@staticmethod
+	def _run_flusher(ref, wakeup, interval):
+		# the thread only holds a strong reference to the sink while flushing
+		while True:
+			wakeup.wait(interval)
+			sink = ref()
+			if sink is None or sink._closed:
+				return
+			# noinspection PyBroadException
+			try:
+				sink.flush()
+			except Exception:
+				_logger.exception('Error while flushing %s:', sink.filename)
+			del sink
+
+	def _flush(self):
+		if not self._pending:
+			return
+		payload = b''.join(self._pending)
+		del self._pending[:]
+		self._pending_size = 0
+		if self.compression is not None:
+			import zlib
+		if self.compression == 'zlib':
+			payload = zlib.compress(payload, self.compression_level)
+		elif self.compression == 'gzip':
+			compressor = zlib.compressobj(self.compression_level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+			payload = compressor.compress(payload) + compressor.flush()
+		block = self._block_header.pack(_SINK_MAGIC, _SINK_CODECS[self.compression], len(payload)) + payload
+		if self._stream is None:
+			self._open_stream()
+		if self.max_bytes and self._file_size > 0 and self._file_size + len(block) > self.max_bytes:
+			self._rotate()
+		self._stream.write(block)
+		self._stream.flush()
+		self._file_size += len(block)
+		if self.fsync == 'flush':
+			os.fsync(self._stream.fileno())
+
+	def _open_stream(self):
+		self._stream = open(self.filename, 'ab')
+		self._file_size = os.fstat(self._stream.fileno()).st_size
+		end = self._find_partial_block()
+		if end is not None:
+			# a process writing to the file was killed in the middle of a block, blocks appended after it would be lost
+			self._stream.truncate(end)
+			self._file_size = end
+
+	def _find_partial_block(self):
+		"""Get the offset of an incomplete block at the end of the file, None if the file ends with a complete block."""
+		if self._file_size == 0:
+			return None
+		with open(self.filename, 'rb') as stream:
+			offset = 0
+			while offset < self._file_size:
+				stream.seek(offset)
+				header = stream.read(self._block_header.size)
+				if len(header) < self._block_header.size:
+					return offset
+				magic, codec, length = self._block_header.unpack(header)
+				if magic != _SINK_MAGIC:
+					# not written by a FileSink, leave it to read_sink() to complain
+					return None
+				if offset + self._block_header.size + length > self._file_size:
+					return offset
+				offset += self._block_header.size + length
+			return None
+
+	def _close_stream(self):
+		if self.fsync != 'never':
+			os.fsync(self._stream.fileno())
+		self._stream.close()
+		self._stream = None
+
+	def _rotate(self):
+		self._close_stream()
+		if self.backup_count > 0:
+			for i in range(self.backup_count - 1, 0, -1):
+				source = '%s.%d' % (self.filename, i)
+				if os.path.exists(source):
+					os.rename(source, '%s.%d' % (self.filename, i + 1))
+			os.rename(self.filename, self.filename + '.1')
+		else:
+			os.remove(self.filename)
+		self._open_stream()
+
+
+def _call_sink(ref, method):
+	"""Call a method of a `FileSink` given by a weak reference, if the sink still exists."""
+	sink = ref()
+	if sink is not None:
+		getattr(sink, method)()
+
+def read_sink(filename, rotated=True):
+	"""Iterate over all messages written by a `FileSink`, oldest first.
+
+	Blocks are read and decompressed one at a time, so files of any size can be read. A truncated block at the end of a
+	file, e.g. if the writing process was killed, is ignored. `FileSink` removes such a block before appending to the
+	file.
+
+	:param filename: the file name given to the `FileSink`
+	:type filename: str
+	:param rotated: if True, also read the rotated files `filename`.N .. `filename`.1 before `filename`
+	:type rotated: bool
+	:rtype: collections.Iterable[str]
+	"""
+	import struct
+	import zlib
+	block_header = struct.Struct(_SINK_BLOCK_HEADER)
+	record_header = struct.Struct(_SINK_RECORD_HEADER)
+	filenames = [filename]
+	if rotated:
+		i = 1
+		while os.path.exists('%s.%d' % (filename, i)):
+			filenames.insert(0, '%s.%d' % (filename, i))
+			i += 1
+	for name in filenames:
+		with open(name, 'rb') as stream:
+			while True:
+				header = stream.read(block_header.size)
+				if len(header) < block_header.size:
+					break
+				magic, codec, length = block_header.unpack(header)
+				if magic != _SINK_MAGIC:
+					raise ValueError('%s is not a logex sink file or is corrupted' % name)
+				payload = stream.read(length)
+				if len(payload) < length:
+					break
+				if codec == 1:
+					payload = zlib.decompress(payload)
+				elif codec == 2:
+					payload = zlib.decompress(payload, 16 + zlib.MAX_WBITS)
+				offset = 0
+				while offset < len(payload):
+					size, = record_header.unpack_from(payload, offset)
+					offset += record_header.size
+					yield payload[offset:offset + size].decode('utf-8')
+					offset += size